@@ -1,5 +1,4 @@
 
-import numpy as np
 import logging
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
@@ -32,6 +31,7 @@ class GeminiPatternAnalyzer:
         if len(rsi_values) < lookback:
             return 0.0
         
+        import numpy as np
         y = np.array(rsi_values[-lookback:])
         x = np.arange(len(y))
         
@@ -0,0 +1,159 @@
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple, Hashable
+
+from .market_analysis import MarketAnalysisService, RSI_WINDOW, BB_WINDOW, CORR_WINDOW, DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger("IndicatorCache")
+
+# Result-affecting parameters of MarketAnalysisService; part of every cache key
+INDICATOR_PARAMS = (("rsi", RSI_WINDOW), ("bb", BB_WINDOW), ("corr", CORR_WINDOW))
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+
+class CachedMarketAnalysisService:
+    """
+    LRU cache with request coalescing in front of MarketAnalysisService.
+
+    Entries are keyed by (symbol, benchmark, last bar date and a content fingerprint of
+    each series, parameters). New bars and rewritten history (upsert corrections, split
+    adjustments) both produce a new key, so stale entries are never served; they age out
+    of the LRU. Concurrent identical requests share one in-flight computation.
+
+    Cached results are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bars: int = 2_000_000):
+        """
+        Args:
+            max_entries: Maximum number of cached results
+            max_bars: Maximum total rows across cached results (~1 KB each as dicts)
+        """
+        self.max_entries = max_entries
+        self.max_bars = max_bars
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Tuple, List[Dict[str, Any]]]" = OrderedDict()
+        self._bars = 0
+        self._in_flight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(symbol: str, data: List[Dict[str, Any]], benchmark: Optional[str] = None,
+                 benchmark_data: Optional[List[Dict[str, Any]]] = None,
+                 low_memory: bool = False,
+                 params: Tuple[Tuple[str, Hashable], ...] = INDICATOR_PARAMS) -> Tuple:
+        # The benchmark's bars matter too: one can arrive after the symbol's bar for the same date.
+        # chunk_size is left out: chunked results are exact, so it never changes the output.
+        return (
+            symbol,
+            benchmark,
+            _last_bar_date(data),
+            _fingerprint(data),
+            _last_bar_date(benchmark_data) if benchmark_data else None,
+            _fingerprint(benchmark_data) if benchmark_data else None,
+            params,
+            (("low_memory", low_memory),),
+        )
+
+    def get_indicators(self, symbol: str, data: List[Dict[str, Any]], benchmark: Optional[str] = None,
+                       benchmark_data: Optional[List[Dict[str, Any]]] = None,
+                       low_memory: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Dict[str, Any]]:
+        """
+        Cached MarketAnalysisService.calculate_technical_indicators.
+
+        Args:
+            symbol: Symbol the bars belong to
+            data: List of OHLCV dictionaries
+            benchmark: Benchmark symbol, if benchmark_data is given
+            benchmark_data: Optional list of OHLCV dictionaries for benchmark correlation
+            low_memory: Passed through to calculate_technical_indicators (float32 output)
+            chunk_size: Passed through to calculate_technical_indicators (not part of the key)
+
+        Returns:
+            List of dictionaries with original data plus technical indicators (shared, read-only)
+        """
+        if not data:
+            return []
+
+        key = self.make_key(symbol, data, benchmark, benchmark_data, low_memory)
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return cached
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.stats.coalesced += 1
+                owner = False
+            else:
+                future = self._in_flight[key] = Future()
+                self.stats.misses += 1
+                owner = True
+
+        if not owner:
+            # Re-raises the owner's exception if its computation failed
+            return future.result()
+
+        try:
+            result = MarketAnalysisService.calculate_technical_indicators(
+                data, benchmark_data, low_memory=low_memory, chunk_size=chunk_size)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            self._store(key, result)
+        future.set_result(result)
+        return result
+
+    def invalidate(self, symbol: Optional[str] = None) -> int:
+        """
+        Drop cached results for `symbol` (as either the symbol or the benchmark),
+        or everything if no symbol is given, e.g. to release memory for a delisted
+        ticker. Not needed for freshness: changed bars already change the key.
+        """
+        with self._lock:
+            keys = [k for k in self._entries if symbol is None or symbol in (k[0], k[1])]
+            for key in keys:
+                self._bars -= len(self._entries.pop(key))
+        if keys:
+            logger.info(f"Invalidated {len(keys)} cached result(s) for {symbol or 'all symbols'}")
+        return len(keys)
+
+    def _store(self, key: Tuple, result: List[Dict[str, Any]]):
+        # Caller holds self._lock
+        if len(result) > self.max_bars:
+            return
+        self._entries[key] = result
+        self._bars += len(result)
+        while len(self._entries) > self.max_entries or self._bars > self.max_bars:
+            _, evicted = self._entries.popitem(last=False)
+            self._bars -= len(evicted)
+            self.stats.evictions += 1
+
+def _last_bar_date(bars: List[Dict[str, Any]]):
+    # Bars usually arrive sorted, but calculate_technical_indicators doesn't require it,
+    # and it accepts undated bars
+    return max((b.get('date') for b in bars if b.get('date') is not None), default=None)
+
+def _fingerprint(bars: List[Dict[str, Any]]) -> int:
+    """Hash of every bar's OHLCV, so corrected or adjusted history changes the key."""
+    return hash(tuple(
+        (b.get('date'), b.get('open'), b.get('high'), b.get('low'), b.get('close'), b.get('volume'))
+        for b in bars
+    ))
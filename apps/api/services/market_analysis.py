@@ -1,7 +1,21 @@
 
-import pandas as pd
-import numpy as np
-from typing import List, Dict, Any, Optional
+import math
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterator
+
+RSI_WINDOW = 14
+BB_WINDOW = 20
+CORR_WINDOW = 30
+
+# Bars of history a chunk needs before its first output row for RSI and
+# Bollinger values to match a single pass over the whole history.
+CHUNK_OVERLAP = max(RSI_WINDOW, BB_WINDOW)
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Documented peak-memory ceilings of iter_technical_indicators, checked by
+# scripts/indicator_memory_benchmark.py.
+CHUNK_BYTES_PER_BAR = 800
+BENCHMARK_BYTES_PER_BAR = 64
 
 class MarketAnalysisService:
     """
@@ -9,19 +23,28 @@ class MarketAnalysisService:
     """
     
     @staticmethod
-    def calculate_technical_indicators(data: List[Dict[str, Any]], benchmark_data: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    def calculate_technical_indicators(data: List[Dict[str, Any]], benchmark_data: Optional[List[Dict[str, Any]]] = None,
+                                       low_memory: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Dict[str, Any]]:
         """
         Calculate technical indicators for the given price data.
         
         Args:
             data: List of OHLCV dictionaries
             benchmark_data: Optional list of OHLCV dictionaries for benchmark correlation
+            low_memory: Use the chunked, compact-dtype path (see iter_technical_indicators)
+            chunk_size: Bars per chunk when low_memory is set
             
         Returns:
             List of dictionaries with original data plus technical indicators
         """
         if not data:
             return []
+        
+        if low_memory:
+            return list(MarketAnalysisService.iter_technical_indicators(data, benchmark_data, chunk_size))
+        
+        # Deferred so importing the service (and API worker startup) doesn't load pandas
+        import pandas as pd
             
         # Convert to DataFrame
         df = pd.DataFrame(data)
@@ -34,20 +57,19 @@ class MarketAnalysisService:
         
         df.sort_values('date', inplace=True)
         
-        # Calculate RSI (14 period)
+        # Calculate RSI (RSI_WINDOW period)
         if 'close' in df.columns:
             delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+            gain = (delta.where(delta > 0, 0)).rolling(window=RSI_WINDOW).mean()
+            loss = (-delta.where(delta < 0, 0)).rolling(window=RSI_WINDOW).mean()
             
             rs = gain / loss
             df['rsi'] = 100 - (100 / (1 + rs))
             df['rsi'] = df['rsi'].fillna(50) # Default neutral for initial periods
             
-            # Calculate Bollinger Bands (20 period, 2 std dev)
-            window = 20
-            sma = df['close'].rolling(window=window).mean()
-            std = df['close'].rolling(window=window).std()
+            # Calculate Bollinger Bands (BB_WINDOW period, 2 std dev)
+            sma = df['close'].rolling(window=BB_WINDOW).mean()
+            std = df['close'].rolling(window=BB_WINDOW).std()
             df['bb_upper'] = sma + (std * 2)
             df['bb_lower'] = sma - (std * 2)
             
@@ -62,8 +84,8 @@ class MarketAnalysisService:
                 # Merge on date
                 merged = pd.merge(df[['date', 'close']], bench_df[['date', 'close']], on='date', suffixes=('', '_bench'))
                 
-                # Calculate rolling correlation (e.g., 30 days)
-                rolling_corr = merged['close'].rolling(window=30).corr(merged['close_bench'])
+                # Calculate rolling correlation (CORR_WINDOW bars)
+                rolling_corr = merged['close'].rolling(window=CORR_WINDOW).corr(merged['close_bench'])
                 
                 # Map back to original dataframe
                 # Note: This is simplified. For exact mapping we might need re-indexing.
@@ -99,3 +121,179 @@ class MarketAnalysisService:
             results.append(item)
             
         return results
+
+    @staticmethod
+    def iter_technical_indicators(data: List[Dict[str, Any]], benchmark_data: Optional[List[Dict[str, Any]]] = None,
+                                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Low-memory variant of calculate_technical_indicators for long (e.g. 1M-bar intraday) histories.
+        
+        Bars are processed in chunks of `chunk_size`, each preceded by CHUNK_OVERLAP bars of
+        history so rolling windows are exact at chunk boundaries. Indicators are computed with
+        fused in-place numpy ops and kept as float32; rows are yielded one at a time instead of
+        being collected into a list.
+        
+        Memory ceilings (beyond the caller's `data` list and any rows the caller keeps):
+            - Indicators: CHUNK_BYTES_PER_BAR per bar of chunk_size (~40 MB at the default),
+              independent of history length.
+            - Benchmark correlation: BENCHMARK_BYTES_PER_BAR per bar of history, for datetime64
+              dates and float64 closes of both series plus the float32 correlation kept across chunks.
+        
+        Yields:
+            The same dictionaries calculate_technical_indicators returns, in date order
+        
+        Raises:
+            ValueError: If chunk_size is not a positive integer
+        """
+        if not isinstance(chunk_size, int) or chunk_size <= 0:
+            raise ValueError(f"chunk_size must be a positive integer, got {chunk_size!r}")
+        return MarketAnalysisService._iter_chunks(data, benchmark_data, chunk_size)
+
+    @staticmethod
+    def _iter_chunks(data: List[Dict[str, Any]], benchmark_data: Optional[List[Dict[str, Any]]],
+                     chunk_size: int) -> Iterator[Dict[str, Any]]:
+        if not data:
+            return
+        
+        import numpy as np
+        import pandas as pd
+        
+        # Sorting the list only reorders references; skip it entirely for already-sorted input
+        keys = (_date_sort_key(d) for d in data)
+        next_keys = (_date_sort_key(d) for d in islice(data, 1, None))
+        if any(a > b for a, b in zip(keys, next_keys)):
+            data = sorted(data, key=_date_sort_key)
+        
+        corr = None
+        if benchmark_data:
+            corr = MarketAnalysisService._benchmark_corr(data, benchmark_data)
+        
+        # A column missing from every bar comes out as None, as in the DataFrame path
+        columns = ['date', 'open', 'high', 'low', 'close', 'volume']
+        present = {col for col in columns if any(col in d for d in data)}
+        has_close = 'close' in present
+        
+        for start in range(0, len(data), chunk_size):
+            lo = max(0, start - CHUNK_OVERLAP)
+            chunk = pd.DataFrame.from_records(data[lo:start + chunk_size], columns=columns)
+            for col in columns[1:]:
+                chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+            
+            if has_close:
+                rsi, bb_upper, bb_lower = MarketAnalysisService._compact_indicators(
+                    chunk['close'].to_numpy(dtype=np.float64))
+            else:
+                rsi = bb_upper = bb_lower = np.full(len(chunk), np.nan, dtype=np.float32)
+            
+            if corr is not None:
+                bench_corr = corr.reindex(pd.to_datetime(chunk['date'])).fillna(0).to_numpy(dtype=np.float32)
+            else:
+                bench_corr = np.zeros(len(chunk), dtype=np.float32)
+            
+            # Drop the overlap rows; they belong to the previous chunk's output
+            skip = start - lo
+            chunk = chunk.iloc[skip:]
+            values = [chunk[col].tolist() if col in present else [None] * len(chunk) for col in columns]
+            rows = zip(
+                *values,
+                rsi[skip:].tolist(), bb_upper[skip:].tolist(), bb_lower[skip:].tolist(), bench_corr[skip:].tolist()
+            )
+            for date, op, hi, lo_, cl, vol, r, up, low, bc in rows:
+                yield {
+                    "timestamp": date,
+                    "open": op,
+                    "high": hi,
+                    "low": lo_,
+                    "close": cl,
+                    "volume": vol,
+                    "rsi": None if math.isnan(r) else round(r, 2),
+                    "bb_upper": None if math.isnan(up) else round(up, 2),
+                    "bb_lower": None if math.isnan(low) else round(low, 2),
+                    "benchmark_corr": None if math.isnan(bc) else round(bc, 4)
+                }
+            del chunk, rsi, bb_upper, bb_lower, bench_corr
+
+    @staticmethod
+    def _compact_indicators(close):
+        """
+        RSI and Bollinger Bands for one chunk as float32 arrays.
+        Matches the pandas formulation in calculate_technical_indicators, but reuses
+        buffers in place instead of materialising delta/gain/loss/rs/sma/std Series.
+        """
+        import numpy as np
+        import pandas as pd
+        
+        # delta -> gain (new buffer) and loss (delta's buffer, in place).
+        # NaN deltas count as 0, as delta.where(delta > 0, 0) does.
+        delta = np.diff(close, prepend=np.nan)
+        np.nan_to_num(delta, copy=False, nan=0.0)
+        gain = np.maximum(delta, 0.0)
+        np.minimum(delta, 0.0, out=delta)
+        np.negative(delta, out=delta)
+        
+        avg_gain = pd.Series(gain).rolling(window=RSI_WINDOW).mean().to_numpy(copy=True)
+        del gain
+        avg_loss = pd.Series(delta).rolling(window=RSI_WINDOW).mean().to_numpy()
+        del delta
+        
+        # rsi = 100 - 100 / (1 + gain / loss), all in avg_gain's buffer
+        # (rolling results are copied out above since pandas may hand back read-only views)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.divide(avg_gain, avg_loss, out=avg_gain)
+            np.add(avg_gain, 1.0, out=avg_gain)
+            np.divide(100.0, avg_gain, out=avg_gain)
+            np.subtract(100.0, avg_gain, out=avg_gain)
+        del avg_loss
+        rsi = avg_gain.astype(np.float32)
+        del avg_gain
+        rsi[np.isnan(rsi)] = 50  # Default neutral for initial periods
+        
+        rolling = pd.Series(close).rolling(window=BB_WINDOW)
+        sma = rolling.mean().to_numpy(copy=True)
+        std = rolling.std().to_numpy(copy=True)
+        std *= 2
+        bb_upper = (sma + std).astype(np.float32)
+        np.subtract(sma, std, out=sma)
+        bb_lower = sma.astype(np.float32)
+        del sma, std
+        
+        # Handle NaN for initial periods
+        missing = np.isnan(bb_upper)
+        bb_upper[missing] = close[missing] * 1.05
+        missing = np.isnan(bb_lower)
+        bb_lower[missing] = close[missing] * 0.95
+        
+        return rsi, bb_upper, bb_lower
+
+    @staticmethod
+    def _benchmark_corr(data: List[Dict[str, Any]], benchmark_data: List[Dict[str, Any]]):
+        """
+        Rolling benchmark correlation for the whole history, as a float32 Series indexed
+        by datetime64 date. Only dates and closes are materialised, never full frames.
+        """
+        import numpy as np
+        import pandas as pd
+        
+        if 'close' not in benchmark_data[0] or 'date' not in benchmark_data[0]:
+            return None
+        
+        def compact(records):
+            frame = pd.DataFrame.from_records(records, columns=['date', 'close'])
+            frame['date'] = pd.to_datetime(frame['date'])
+            frame['close'] = pd.to_numeric(frame['close'], errors='coerce').astype(np.float64)
+            return frame
+        
+        bench_df = compact(benchmark_data)
+        merged = pd.merge(compact(data), bench_df, on='date', suffixes=('', '_bench'))
+        del bench_df
+        
+        corr = merged['close'].rolling(window=CORR_WINDOW).corr(merged['close_bench']).astype(np.float32)
+        corr.index = merged['date']
+        del merged
+        # Last value wins for duplicate dates, as the dict mapping does
+        return corr[~corr.index.duplicated(keep='last')]
+
+def _date_sort_key(bar: Dict[str, Any]):
+    # Bars without a date sort last, like DataFrame.sort_values puts NaN
+    date = bar.get('date')
+    return (date is None, date)
@@ -4,9 +4,9 @@ import time
 import json
 import logging
 import argparse
-import psycopg2
 from typing import List, Dict, Any
-import google.generativeai as genai
+
+from pipeline_metrics import stage, reset_report, add_report_args
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -16,7 +16,9 @@ class GeminiBatchPipeline:
     def __init__(self, api_key: str, model_name: str = "gemini-1.5-pro"):
         self.api_key = api_key
         self.model_name = model_name
-        genai.configure(api_key=self.api_key)
+        # psycopg2 and the Gemini SDK are imported on first use so that --help
+        # and DB-only simulation runs don't pay for the SDK import.
+        self._genai = None
         
         # Database config (Environmental)
         self.db_params = {
@@ -27,37 +29,49 @@ class GeminiBatchPipeline:
             "password": os.environ.get("POSTGRES_PASSWORD", "postgres")
         }
 
+    @property
+    def genai(self):
+        """Import and configure the Gemini SDK on first use."""
+        if self._genai is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            self._genai = genai
+        return self._genai
+
     def get_db_connection(self):
+        import psycopg2
         return psycopg2.connect(**self.db_params)
 
     def extract_data(self, limit: int = 500) -> List[Dict]:
         """Step 1: Extraction - Query data from DB."""
         logger.info("Extracting data from DB...")
         try:
-            conn = self.get_db_connection()
-            cur = conn.cursor()
-            # Simple query to get recent data for symbols
-            # In production this would be complex join "merged_price_data"
-            query = """
-                SELECT symbol, json_agg(
-                    json_build_object('date', date, 'close', close, 'volume', volume) 
-                    ORDER BY date DESC
-                ) as data
-                FROM public.prices 
-                GROUP BY symbol 
-                LIMIT %s
-            """
-            cur.execute(query, (limit,))
-            rows = cur.fetchall()
-            
-            extracted = []
-            for row in rows:
-                extracted.append({
-                    "symbol": row[0],
-                    "data": row[1][:30] # Limit to last 30 days for prompt context
-                })
-            
-            conn.close()
+            with stage("extract_data") as m:
+                conn = self.get_db_connection()
+                cur = conn.cursor()
+                # Simple query to get recent data for symbols
+                # In production this would be complex join "merged_price_data"
+                query = """
+                    SELECT symbol, json_agg(
+                        json_build_object('date', date, 'close', close, 'volume', volume) 
+                        ORDER BY date DESC
+                    ) as data
+                    FROM public.prices 
+                    GROUP BY symbol 
+                    LIMIT %s
+                """
+                cur.execute(query, (limit,))
+                rows = cur.fetchall()
+                
+                extracted = []
+                for row in rows:
+                    extracted.append({
+                        "symbol": row[0],
+                        "data": row[1][:30] # Limit to last 30 days for prompt context
+                    })
+                
+                conn.close()
+                m.add_rows(len(extracted))
             return extracted
         except Exception as e:
             logger.error(f"Extraction failed: {e}")
@@ -75,7 +89,7 @@ class GeminiBatchPipeline:
 
         output_file = "batch_job_input.jsonl"
         
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with stage("serialize_requests") as m, open(output_file, 'w', encoding='utf-8') as f:
             for item in data_items:
                 # Custom ID to track results back to symbol
                 custom_id = f"req_{item['symbol']}_{int(time.time())}"
@@ -89,7 +103,8 @@ class GeminiBatchPipeline:
                         "systemInstruction": {"parts": [{"text": instruction}]}
                     }
                 }
-                f.write(json.dumps(request) + "\n")
+                m.add_bytes(f.write(json.dumps(request) + "\n"))
+                m.add_rows(1)
         
         return output_file
 
@@ -109,20 +124,28 @@ class GeminiBatchPipeline:
 
         logger.info(f"Prepared {len(data)} requests in {jsonl_file}")
         
-        # 3. Ingestion & 4. Execution would follow here using genai.files.upload and client.batches.create
+        # 3. Ingestion & 4. Execution would follow here using self.genai.upload_file and client.batches.create
         # Since I don't have a live key, verified environment, or the latest alpha SDK installed in this env,
         # I will stop here as 'completed' per the script's logic flow.
         
         logger.info("Ready for Batch Submission (Upload & Job Create).")
         # In real execution:
-        # file_ref = genai.upload_file(jsonl_file)
-        # job = genai.batches.create(src=file_ref.name, model=self.model_name)
+        # file_ref = self.genai.upload_file(jsonl_file)
+        # job = self.genai.batches.create(src=file_ref.name, model=self.model_name)
         # ... logic continues ...
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gemini Batch Analysis Pipeline")
+    add_report_args(parser)
+    args = parser.parse_args()
+
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
         logger.warning("GEMINI_API_KEY not found. Running in simulation mode (DB extraction only).")
     
+    report = reset_report("batch_analysis")
     pipeline = GeminiBatchPipeline(api_key or "demo_key")
-    pipeline.run()
+    try:
+        pipeline.run()
+    finally:
+        report.write(args.report, args.prometheus)
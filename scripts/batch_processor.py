@@ -7,36 +7,44 @@ import argparse
 from typing import List, Dict, Any
 from pathlib import Path
 
-# Note: In a production environment, import google.generativeai or correct client
-# Assuming 'google.generativeai' is the package name for standard Gemini usage, 
-# but user specifically mentioned `from google import genai` which implies the newer AI Studio SDK or Vertex AI.
-# I will use standard import patterns for the latest Google Gen AI SDK.
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
+from pipeline_metrics import stage, reset_report, add_report_args
+
+# Note: The Gemini SDK (google.generativeai) is imported lazily in `genai` below.
+# It is by far the most expensive import here and is not needed for --help
+# or for serializing requests, which is most of what short-lived workers do.
 
-# Configure Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("batch_processor.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger("BatchProcessor")
 
+def configure_logging():
+    """Configure logging for CLI runs (kept out of import so importing opens no log file)."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("batch_processor.log"),
+            logging.StreamHandler()
+        ]
+    )
+
 class BatchProcessor:
     def __init__(self, api_key: str, data_dir: str = "./data"):
         self.api_key = api_key
         self.data_dir = Path(data_dir)
-        
-        # Configure Gemini
-        genai.configure(api_key=self.api_key)
+        self._genai = None
         
         # Ensure scripts output directory exists
         self.output_dir = Path("./batch_outputs")
         self.output_dir.mkdir(exist_ok=True)
 
+    @property
+    def genai(self):
+        """Import and configure the Gemini SDK on first use."""
+        if self._genai is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            self._genai = genai
+        return self._genai
+
     def prepare_jsonl(self, symbols: List[Dict[str, Any]], system_instruction: str, output_file: str) -> str:
         """
         Serialize requests to JSONL format for Batch API.
@@ -45,7 +53,7 @@ class BatchProcessor:
         
         jsonl_path = self.output_dir / output_file
         
-        with open(jsonl_path, 'w', encoding='utf-8') as f:
+        with stage("prepare_jsonl") as m, open(jsonl_path, 'w', encoding='utf-8') as f:
             for s in symbols:
                 # Construct the request object compliant with Gemini Batch API
                 # Note: The exact schema depends on the specific API version (Vertex AI vs AI Studio).
@@ -69,7 +77,8 @@ class BatchProcessor:
                         }
                     }
                 }
-                f.write(json.dumps(req) + "\n")
+                m.add_bytes(f.write(json.dumps(req) + "\n"))
+                m.add_rows(1)
                 
         logger.info(f"JSONL file written to {jsonl_path}")
         return str(jsonl_path)
@@ -79,7 +88,7 @@ class BatchProcessor:
         logger.info(f"Uploading {file_path}...")
         # Note: genai.upload_file is available in newer SDK versions
         try:
-            sample_file = genai.upload_file(path=file_path, display_name=Path(file_path).name)
+            sample_file = self.genai.upload_file(path=file_path, display_name=Path(file_path).name)
             logger.info(f"File uploaded: {sample_file.name}")
             return sample_file
         except Exception as e:
@@ -179,16 +188,22 @@ def main():
     parser.add_argument("--symbols", required=True, help="Path to JSON file containing symbols data")
     parser.add_argument("--prompt", required=True, help="Path to text file containing system prompt")
     parser.add_argument("--model", default="gemini-1.5-pro", help="Model to use (gemini-1.5-pro or gemini-1.5-flash)")
+    add_report_args(parser)
     
     args = parser.parse_args()
+    configure_logging()
     
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
         logger.error("GEMINI_API_KEY environment variable not set")
         return
 
+    report = reset_report("batch_processor")
     processor = BatchProcessor(api_key)
-    processor.run_pipeline(args.symbols, args.prompt, args.model)
+    try:
+        processor.run_pipeline(args.symbols, args.prompt, args.model)
+    finally:
+        report.write(args.report, args.prometheus)
 
 if __name__ == "__main__":
     main()
@@ -1,17 +1,34 @@
 
 import os
+import io
 import csv
 import logging
 import argparse
-import psycopg2
-from psycopg2.extras import execute_values
-from datetime import datetime
+from collections import defaultdict
+from datetime import date, datetime
 from pathlib import Path
+from typing import Dict, List, Optional
+
+from pipeline_metrics import stage, reset_report, add_report_args
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("DataIngestion")
 
+# CSV date formats recognised when routing rows to yearly partitions
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%Y/%m/%d")
+
+UPSERT_QUERY = """
+INSERT INTO public.{table} (symbol, date, open, high, low, close, volume)
+VALUES %s
+ON CONFLICT (symbol, date) DO UPDATE 
+SET open = EXCLUDED.open,
+    high = EXCLUDED.high,
+    low = EXCLUDED.low,
+    close = EXCLUDED.close,
+    volume = EXCLUDED.volume;
+"""
+
 def get_db_connection():
     """Connect to the Postgres database."""
     # Assuming standard Supabase/Postgres env vars
@@ -22,6 +39,8 @@ def get_db_connection():
     db_user = os.environ.get("POSTGRES_USER", "postgres")
     db_pass = os.environ.get("POSTGRES_PASSWORD", "postgres")
     
+    # Imported here so --help and CSV parsing don't load the driver
+    import psycopg2
     conn = psycopg2.connect(
         host=db_host,
         port=db_port,
@@ -78,12 +97,13 @@ def ingest_data(file_path: str):
     
     # Very basic CSV support
     if path.suffix.lower() == '.csv':
-        with open(path, 'r', encoding='utf-8') as f:
+        with stage("ingest_data.parse") as m, open(path, 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
             for row in reader:
                 parsed = parse_csv_line(row)
                 if parsed:
                     rows_to_insert.append(parsed)
+            m.add_rows(len(rows_to_insert))
     
     if not rows_to_insert:
         logger.warning("No valid rows found to insert.")
@@ -91,19 +111,8 @@ def ingest_data(file_path: str):
 
     logger.info(f"Inserting {len(rows_to_insert)} rows...")
     
-    insert_query = """
-    INSERT INTO public.prices (symbol, date, open, high, low, close, volume)
-    VALUES %s
-    ON CONFLICT (symbol, date) DO UPDATE 
-    SET open = EXCLUDED.open,
-        high = EXCLUDED.high,
-        low = EXCLUDED.low,
-        close = EXCLUDED.close,
-        volume = EXCLUDED.volume;
-    """
-    
     try:
-        execute_values(cur, insert_query, rows_to_insert)
+        load_rows(cur, rows_to_insert)
         conn.commit()
         logger.info("Ingestion successful.")
     except Exception as e:
@@ -113,9 +122,140 @@ def ingest_data(file_path: str):
         cur.close()
         conn.close()
 
+def load_rows(cur, rows: List[tuple]) -> Dict[str, int]:
+    """
+    Upsert parsed rows into public.prices, routing each year straight to its partition.
+    Years without a partition take the bulk-load fast path (load_new_partition).
+    Falls back to a single upsert into public.prices if the table isn't partitioned yet.
+
+    Returns:
+        Rows loaded per path: "legacy_upsert", "partition_upsert" and/or "attach_partition"
+    """
+    rows = dedupe_rows(normalise_dates(cur, rows))
+    loaded = defaultdict(int)
+
+    if not prices_is_partitioned(cur):
+        with stage("ingest_data.upsert") as m:
+            upsert_rows(cur, "prices", rows)
+            m.add_rows(len(rows))
+        loaded["legacy_upsert"] += len(rows)
+        return dict(loaded)
+
+    for year, year_rows in group_by_year(rows).items():
+        # Concurrent workers may load the same missing year: serialise partition
+        # creation per year and re-check, so the loser upserts into the winner's partition
+        if not partition_exists(cur, year):
+            lock_partition_year(cur, year)
+        if partition_exists(cur, year):
+            with stage("ingest_data.upsert") as m:
+                upsert_rows(cur, f"prices_y{year}", year_rows)
+                m.add_rows(len(year_rows))
+            loaded["partition_upsert"] += len(year_rows)
+        else:
+            with stage("ingest_data.attach_partition") as m:
+                load_new_partition(cur, year, year_rows)
+                m.add_rows(len(year_rows))
+            loaded["attach_partition"] += len(year_rows)
+    return dict(loaded)
+
+def parse_date(date_str) -> Optional[date]:
+    """Parse a CSV date in one of DATE_FORMATS, or None if the format isn't recognised here."""
+    text = str(date_str).strip()[:10]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def normalise_dates(cur, rows: List[tuple]) -> List[tuple]:
+    """
+    Replace each row's date string with a date, so rows dedupe and route by the
+    date Postgres will store. Formats not in DATE_FORMATS are cast by Postgres itself
+    (raising, as the INSERT would, on anything it can't parse). Undated rows are dropped.
+    """
+    parsed = {}
+    unknown = set()
+    for row in rows:
+        if row[1] is None or row[1] in parsed:
+            continue
+        value = parse_date(row[1])
+        if value is None:
+            unknown.add(row[1])
+        else:
+            parsed[row[1]] = value
+
+    if unknown:
+        cur.execute("SELECT d, d::date FROM unnest(%s::text[]) AS d", (list(unknown),))
+        parsed.update(cur.fetchall())
+
+    normalised = [(r[0], parsed[r[1]]) + tuple(r[2:]) for r in rows if r[1] is not None]
+    if len(normalised) < len(rows):
+        logger.warning(f"Skipping {len(rows) - len(normalised)} rows without a date")
+    return normalised
+
+def dedupe_rows(rows: List[tuple]) -> List[tuple]:
+    """Keep the last row per (symbol, date), matching sequential upsert semantics."""
+    # A single INSERT ... ON CONFLICT DO UPDATE can't touch the same key twice
+    return list({(r[0], r[1]): r for r in rows}.values())
+
+def group_by_year(rows: List[tuple]) -> Dict[int, List[tuple]]:
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row[1].year].append(row)
+    return groups
+
+def prices_is_partitioned(cur) -> bool:
+    cur.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('public.prices')")
+    result = cur.fetchone()
+    return bool(result and result[0])
+
+def partition_exists(cur, year: int) -> bool:
+    cur.execute("SELECT to_regclass(%s)", (f"public.prices_y{year}",))
+    return cur.fetchone()[0] is not None
+
+def lock_partition_year(cur, year: int):
+    """Transaction-scoped advisory lock on creating `year`'s partition (released on commit/rollback)."""
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext('prices_partition'), %s)", (year,))
+
+def upsert_rows(cur, table: str, rows: List[tuple]):
+    from psycopg2.extras import execute_values
+    execute_values(cur, UPSERT_QUERY.format(table=table), rows, page_size=1000)
+
+def load_new_partition(cur, year: int, rows: List[tuple]):
+    """
+    Fast path for a historical year with no partition yet: COPY into a bare table
+    (no indexes to maintain per row), build the primary key once, then ATTACH it.
+    The CHECK constraint matching the partition bound lets ATTACH skip its validation scan.
+    """
+    name = f"prices_y{year}"
+    lower, upper = date(year, 1, 1), date(year + 1, 1, 1)
+    logger.info(f"Bulk loading {len(rows)} rows into new partition {name}...")
+
+    cur.execute(f"CREATE TABLE public.{name} (LIKE public.prices INCLUDING DEFAULTS)")
+    cur.execute(f"ALTER TABLE public.{name} ADD CONSTRAINT {name}_bound CHECK (date >= %s AND date < %s)", (lower, upper))
+
+    # Write in (date, symbol) order so each BRIN range on date covers a narrow span of days
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(sorted(rows, key=lambda r: (r[1], r[0])))
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY public.{name} (symbol, date, open, high, low, close, volume) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+    cur.execute(f"ALTER TABLE public.{name} ADD PRIMARY KEY (symbol, date)")
+    cur.execute(f"ALTER TABLE public.prices ATTACH PARTITION public.{name} FOR VALUES FROM (%s) TO (%s)", (lower, upper))
+    cur.execute(f"ALTER TABLE public.{name} DROP CONSTRAINT {name}_bound")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Bulk Data Ingestion")
     parser.add_argument("file", help="Path to CSV file containing market data")
+    add_report_args(parser)
     args = parser.parse_args()
     
-    ingest_data(args.file)
+    report = reset_report("data_ingestion")
+    try:
+        ingest_data(args.file)
+    finally:
+        report.write(args.report, args.prometheus)
@@ -1,5 +1,4 @@
 import json
-import numpy as np
 
 class GeminiPatternAnalyzer:
     """
@@ -21,6 +20,7 @@ class GeminiPatternAnalyzer:
         if len(rsi_values) < 3:
             return 0.0
         
+        import numpy as np
         y = np.array(rsi_values[-3:])
         x = np.array([0, 1, 2])
         A = np.vstack([x, np.ones(len(x))]).T
@@ -38,6 +38,8 @@ class GeminiPatternAnalyzer:
         Returns the modified analysis object.
         """
         
+        import numpy as np
+
         # Extract metrics
         # Assuming market_data is a list of dicts with 'volume', 'rsi' keys
         # and checking the LAST candle for current volume
@@ -0,0 +1,134 @@
+
+import sys
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Dict, Any, Callable
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("IndicatorCacheCheck")
+
+# The API services live in apps/api and are imported as the `services` package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "apps" / "api"))
+
+from services.market_analysis import MarketAnalysisService
+from services.indicator_cache import CachedMarketAnalysisService
+
+def bars(n: int, start_price: float = 100.0) -> List[Dict[str, Any]]:
+    first = date(2024, 1, 1)
+    return [
+        {"date": (first + timedelta(days=i)).isoformat(), "open": start_price + i, "high": start_price + i + 1,
+         "low": start_price + i - 1, "close": start_price + i + (i % 3), "volume": 1000 + i}
+        for i in range(n)
+    ]
+
+@contextmanager
+def patched_compute(delay: float = 0.0, fail: bool = False):
+    """Slow down (or break) the underlying computation so concurrent requests overlap."""
+    original = MarketAnalysisService.calculate_technical_indicators
+    calls = []
+
+    def compute(*args, **kwargs):
+        calls.append(1)
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError("computation failed")
+        return original(*args, **kwargs)
+
+    MarketAnalysisService.calculate_technical_indicators = staticmethod(compute)
+    try:
+        yield calls
+    finally:
+        MarketAnalysisService.calculate_technical_indicators = staticmethod(original)
+
+def concurrently(n: int, func: Callable) -> List[Any]:
+    """Run func in n threads at once; returns each thread's result or exception."""
+    results = [None] * n
+    barrier = threading.Barrier(n)
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = func()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def check_coalescing() -> bool:
+    cache = CachedMarketAnalysisService()
+    data, bench = bars(300), bars(300, start_price=50.0)
+    with patched_compute(delay=0.2) as calls:
+        results = concurrently(50, lambda: cache.get_indicators("AAPL", data, "SPY", bench))
+    return (len(calls) == 1 and cache.stats.misses == 1 and cache.stats.coalesced == 49
+            and all(r is results[0] for r in results))
+
+def check_hits_and_keys() -> bool:
+    cache = CachedMarketAnalysisService()
+    data = bars(100)
+    first = cache.get_indicators("AAPL", data)
+    if cache.get_indicators("AAPL", data) is not first:
+        return False
+    # Output-affecting options are part of the key
+    low_memory = cache.get_indicators("AAPL", data, low_memory=True)
+    if low_memory is first:
+        return False
+    # chunk_size only bounds memory; the chunked result is the same, so it shares the entry
+    if cache.get_indicators("AAPL", data, low_memory=True, chunk_size=7) is not low_memory:
+        return False
+    # A corrected historical bar (same last date, same count) must not be served stale
+    corrected = [dict(b) for b in data]
+    corrected[5]["close"] += 10
+    if cache.get_indicators("AAPL", corrected) is first:
+        return False
+    # Undated bars are accepted, as by the uncached path
+    undated = data + [{"date": None, "close": 100.0}]
+    cache.get_indicators("AAPL", undated)
+    return cache.stats.hits == 2 and cache.stats.misses == 4
+
+def check_eviction() -> bool:
+    cache = CachedMarketAnalysisService(max_entries=2, max_bars=250)
+    for symbol in ("A", "B", "C"):
+        cache.get_indicators(symbol, bars(100))
+    # Both bounds hold: at most 2 entries and at most 250 cached rows
+    if cache.stats.evictions != 1 or cache.invalidate() != 2:
+        return False
+    cache.get_indicators("BIG", bars(300))  # larger than max_bars: computed but not cached
+    return cache.invalidate() == 0
+
+def check_error_propagation() -> bool:
+    cache = CachedMarketAnalysisService()
+    data = bars(100)
+    with patched_compute(delay=0.2, fail=True) as calls:
+        results = concurrently(10, lambda: cache.get_indicators("AAPL", data))
+    if len(calls) != 1 or not all(isinstance(r, RuntimeError) for r in results):
+        return False
+    # Nothing cached or left in flight; the next request recomputes
+    with patched_compute() as calls:
+        cache.get_indicators("AAPL", data)
+    return len(calls) == 1
+
+def main():
+    checks = [
+        ("coalescing", check_coalescing),
+        ("hits and keys", check_hits_and_keys),
+        ("eviction", check_eviction),
+        ("error propagation", check_error_propagation),
+    ]
+    failed = False
+    for label, check in checks:
+        ok = check()
+        failed |= not ok
+        logger.info(f"{label:<20} {'OK' if ok else 'FAILED'}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+
+import sys
+import random
+import logging
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Dict, Any
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("IndicatorMemoryBenchmark")
+
+from pipeline_metrics import stage, reset_report, add_report_args
+
+# The API services live in apps/api and are imported as the `services` package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "apps" / "api"))
+
+from services.market_analysis import (
+    MarketAnalysisService,
+    DEFAULT_CHUNK_SIZE,
+    CHUNK_BYTES_PER_BAR,
+    BENCHMARK_BYTES_PER_BAR,
+)
+
+def synthetic_bars(n: int, seed: int) -> List[Dict[str, Any]]:
+    """Random-walk 1-minute bars shaped like the rows the API passes in."""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    price = 100.0
+    bars = []
+    for i in range(n):
+        price *= 1 + rng.gauss(0, 0.001)
+        bars.append({
+            "date": (start + timedelta(minutes=i)).isoformat(),
+            "open": price, "high": price * 1.001, "low": price * 0.999, "close": price,
+            "volume": rng.randint(100, 10_000),
+        })
+    return bars
+
+def peak_bytes(data, benchmark_data, chunk_size: int) -> int:
+    """Traced peak while streaming the low-memory path without keeping its rows."""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    with stage("calculate_technical_indicators.low_memory") as m:
+        for _ in MarketAnalysisService.iter_technical_indicators(data, benchmark_data, chunk_size):
+            m.add_rows(1)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return peak
+
+def check_equivalence(n: int, chunk_size: int) -> bool:
+    """Chunked output must match the single-pass path, including across chunk boundaries."""
+    data = synthetic_bars(n, seed=1)
+    bench = synthetic_bars(n, seed=2)
+    random.Random(3).shuffle(data)
+    with stage("calculate_technical_indicators") as m:
+        full = MarketAnalysisService.calculate_technical_indicators(data, bench)
+        m.add_rows(len(full))
+    chunked = MarketAnalysisService.calculate_technical_indicators(data, bench, low_memory=True, chunk_size=chunk_size)
+    tolerance = {"rsi": 0.011, "bb_upper": 0.011, "bb_lower": 0.011, "benchmark_corr": 0.00011}
+    for a, b in zip(full, chunked):
+        if a["timestamp"] != b["timestamp"]:
+            return False
+        for key, tol in tolerance.items():
+            if (a[key] is None) != (b[key] is None):
+                return False
+            if a[key] is not None and abs(a[key] - b[key]) > tol:
+                return False
+    return len(full) == len(chunked)
+
+def check_edge_cases() -> bool:
+    """Undated bars and missing OHLCV columns must come out the same as the single-pass path."""
+    bars = [{"date": b["date"], "close": b["close"]} for b in synthetic_bars(60, seed=4)]
+    bars.append({"date": None, "close": 100.0})
+    bars.reverse()
+    full = MarketAnalysisService.calculate_technical_indicators(bars)
+    chunked = MarketAnalysisService.calculate_technical_indicators(bars, low_memory=True, chunk_size=7)
+    keys = ("open", "high", "low", "volume", "close", "rsi", "bb_upper", "bb_lower")
+    return len(full) == len(chunked) and all(
+        a[k] == b[k] for a, b in zip(full, chunked) for k in keys
+    )
+
+def run_checks(args) -> bool:
+    """Run the equivalence checks and the memory ceilings; returns True if any failed."""
+    if not check_equivalence(5_000, chunk_size=333):
+        logger.error("Chunked indicators differ from the single-pass computation")
+        return True
+    if not check_edge_cases():
+        logger.error("Chunked indicators differ from the single-pass computation on undated / partial bars")
+        return True
+    logger.info("Chunked output matches single-pass output")
+
+    logger.info(f"Generating {args.bars} synthetic bars...")
+    data = synthetic_bars(args.bars, seed=1)
+    bench = synthetic_bars(args.bars, seed=2)
+    # Warm up so lazy pandas/numpy imports aren't counted against the ceiling
+    list(MarketAnalysisService.iter_technical_indicators(data[:1000], bench[:1000]))
+
+    failed = False
+    for label, benchmark_data in (("indicators", None), ("indicators + benchmark", bench)):
+        ceiling = CHUNK_BYTES_PER_BAR * args.chunk_size
+        if benchmark_data:
+            ceiling += BENCHMARK_BYTES_PER_BAR * args.bars
+        peak = peak_bytes(data, benchmark_data, args.chunk_size)
+        status = "OK" if peak <= ceiling else "OVER CEILING"
+        failed |= peak > ceiling
+        logger.info(f"{label:<24} peak {peak / 1e6:8.1f} MB  ceiling {ceiling / 1e6:8.1f} MB  {status}")
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Check iter_technical_indicators against its documented memory ceilings")
+    parser.add_argument("--bars", type=int, default=1_000_000, help="History length to stream")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Bars per chunk")
+    add_report_args(parser)
+    args = parser.parse_args()
+
+    # This script measures memory with tracemalloc itself, so the report must not trace it too
+    report = reset_report("indicator_memory_benchmark", trace_memory=False)
+    try:
+        failed = run_checks(args)
+    finally:
+        report.write(args.report, args.prometheus)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
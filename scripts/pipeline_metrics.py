@@ -0,0 +1,248 @@
+
+import os
+import json
+import time
+import logging
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Iterator, Callable
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger("PipelineMetrics")
+
+
+@dataclass
+class StageMetrics:
+    """Aggregated measurements for one named pipeline stage."""
+    name: str
+    calls: int = 0
+    errors: int = 0
+    wall_time_s: float = 0.0
+    rows: int = 0
+    bytes_written: int = 0
+    peak_memory_bytes: Optional[int] = None
+
+
+class StageHandle:
+    """
+    Yielded by RunReport.stage() so the instrumented code can attach
+    row / byte counts to the stage it is running in.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.bytes_written = 0
+        self._peak = 0
+
+    def add_rows(self, n: int):
+        self.rows += int(n)
+
+    def add_bytes(self, n: int):
+        """
+        Record n bytes written. For text files, the return value of f.write() is a
+        character count; it equals bytes only for ASCII output such as json.dumps
+        (which escapes non-ASCII by default).
+        """
+        self.bytes_written += int(n)
+
+
+class RunReport:
+    """
+    Collects per-stage wall time, rows processed, bytes written and peak memory.
+
+    Stages are aggregated by name so repeated calls stay bounded in memory.
+    Peak memory uses tracemalloc, which slows allocation-heavy code, so it is
+    only collected when trace_memory=True or PIPELINE_TRACE_MEMORY=1.
+
+    Safe to use from several threads: each thread keeps its own stack of open
+    stages and totals are updated under a lock. tracemalloc's peak is
+    process-wide, so when stages overlap across threads the recorded peak is an
+    upper bound that includes the other threads' allocations.
+    """
+
+    def __init__(self, run_name: str = "pipeline", trace_memory: Optional[bool] = None):
+        self.run_name = run_name
+        if trace_memory is None:
+            trace_memory = os.environ.get("PIPELINE_TRACE_MEMORY") == "1"
+        self.trace_memory = trace_memory
+        self.started_at = datetime.now(timezone.utc)
+        self.stages: Dict[str, StageMetrics] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open_stages = 0  # across all threads
+
+    def _stack(self) -> List[StageHandle]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageHandle]:
+        """Time a block of code and record it under `name`."""
+        handle = StageHandle(name)
+        stack = self._stack()
+        tracing = self.trace_memory
+        with self._lock:
+            if tracing:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                # Only reset the (process-wide) peak when no other thread is mid-stage;
+                # fold the running peak into this thread's enclosing stage first.
+                if self._open_stages == len(stack):
+                    if stack:
+                        stack[-1]._peak = max(stack[-1]._peak, tracemalloc.get_traced_memory()[1])
+                    tracemalloc.reset_peak()
+            self._open_stages += 1
+
+        stack.append(handle)
+        failed = False
+        start = time.perf_counter()
+        try:
+            yield handle
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self._open_stages -= 1
+                peak = None
+                if tracing:
+                    handle._peak = max(handle._peak, tracemalloc.get_traced_memory()[1])
+                    if stack:
+                        stack[-1]._peak = max(stack[-1]._peak, handle._peak)
+                    peak = handle._peak
+                self._record(handle, elapsed, failed, peak)
+
+    def _record(self, handle: StageHandle, elapsed: float, failed: bool, peak: Optional[int]):
+        # Caller holds self._lock
+        metrics = self.stages.get(handle.name)
+        if metrics is None:
+            metrics = self.stages[handle.name] = StageMetrics(name=handle.name)
+        metrics.calls += 1
+        metrics.errors += int(failed)
+        metrics.wall_time_s += elapsed
+        metrics.rows += handle.rows
+        metrics.bytes_written += handle.bytes_written
+        if peak is not None:
+            metrics.peak_memory_bytes = max(metrics.peak_memory_bytes or 0, peak)
+        logger.debug("Stage %s finished in %.3fs (%d rows)", handle.name, elapsed, handle.rows)
+
+    def to_dict(self) -> Dict[str, Any]:
+        max_rss = None
+        if resource is not None:
+            # ru_maxrss is KiB on Linux
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return {
+            "run": self.run_name,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "max_rss_bytes": max_rss,
+            "stages": self._snapshot(),
+        }
+
+    def _snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [asdict(m) for m in self.stages.values()]
+
+    def write_json(self, path: str) -> str:
+        """Write the structured run report."""
+        _atomic_write(path, json.dumps(self.to_dict(), indent=2, default=str))
+        logger.info("Run report written to %s", path)
+        return path
+
+    def write_prometheus(self, path: str) -> str:
+        """Write a node_exporter textfile-collector compatible .prom file."""
+        series = [
+            ("pipeline_stage_duration_seconds", "Wall time spent in the stage.", "wall_time_s"),
+            ("pipeline_stage_calls", "Number of times the stage ran.", "calls"),
+            ("pipeline_stage_errors", "Number of stage runs that raised.", "errors"),
+            ("pipeline_stage_rows", "Rows processed by the stage.", "rows"),
+            ("pipeline_stage_bytes_written", "Bytes written by the stage.", "bytes_written"),
+            ("pipeline_stage_peak_memory_bytes", "Peak traced Python memory during the stage.", "peak_memory_bytes"),
+        ]
+        stages = self._snapshot()
+        lines = []
+        for metric, help_text, field in series:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for m in stages:
+                value = m[field]
+                if value is None:
+                    continue
+                lines.append(f'{metric}{{run="{self.run_name}",stage="{m["name"]}"}} {value}')
+        _atomic_write(path, "\n".join(lines) + "\n")
+        logger.info("Prometheus metrics written to %s", path)
+        return path
+
+    def write(self, report_path: Optional[str] = None, prometheus_path: Optional[str] = None):
+        """Convenience for CLI entry points: write whichever outputs were requested."""
+        if report_path:
+            self.write_json(report_path)
+        if prometheus_path:
+            self.write_prometheus(prometheus_path)
+
+
+def _atomic_write(path: str, content: str):
+    # Write-then-rename so scrapers never read a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+_report = RunReport()
+
+
+def get_report() -> RunReport:
+    """Return the process-wide run report."""
+    return _report
+
+
+def reset_report(run_name: str = "pipeline", trace_memory: Optional[bool] = None) -> RunReport:
+    """Start a fresh process-wide run report (call once per CLI run)."""
+    global _report
+    _report = RunReport(run_name, trace_memory)
+    return _report
+
+
+def add_report_args(parser):
+    """Add the --report / --prometheus options shared by the pipeline CLIs."""
+    parser.add_argument("--report", help="Write a JSON run report (stage timings, rows, bytes, memory) to this path")
+    parser.add_argument("--prometheus", help="Write stage metrics in Prometheus text format to this path")
+    return parser
+
+
+def stage(name: str):
+    """Context manager recording a stage on the process-wide report."""
+    return _report.stage(name)
+
+
+def instrumented(name: Optional[str] = None) -> Callable:
+    """
+    Decorator form of stage(). If the function returns a list, its length
+    is recorded as rows processed.
+    """
+    def decorator(func: Callable) -> Callable:
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _report.stage(stage_name) as s:
+                result = func(*args, **kwargs)
+                if isinstance(result, list):
+                    s.add_rows(len(result))
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,144 @@
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import statistics
+from datetime import date, timedelta
+from typing import List, Dict, Any
+
+from data_ingestion import get_db_connection, load_rows
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("PricesBenchmark")
+
+SYMBOL_PREFIX = "BENCH_"
+
+# Synthetic history ends here by default: years this old have no partition on a restored
+# snapshot (the migration only creates partitions from the earliest real row onwards),
+# so the post-migration first load exercises the COPY + ATTACH fast path.
+DEFAULT_END = date(1990, 1, 1)
+
+LATEST_BARS_QUERY = """
+    SELECT date, open, high, low, close, volume
+    FROM public.prices
+    WHERE symbol = %s
+    ORDER BY date DESC
+    LIMIT %s
+"""
+
+def synthetic_rows(symbols: int, days: int, end: date) -> List[tuple]:
+    """Daily OHLCV rows in the same tuple shape parse_csv_line produces."""
+    rng = random.Random(42)
+    rows = []
+    for s in range(symbols):
+        symbol = f"{SYMBOL_PREFIX}{s:05d}"
+        price = rng.uniform(10, 500)
+        for d in range(days):
+            price *= 1 + rng.gauss(0, 0.01)
+            day = end - timedelta(days=days - d)
+            rows.append((symbol, day.isoformat(), price, price * 1.01, price * 0.99, price, rng.randint(1_000, 1_000_000)))
+    return rows
+
+def bench_ingestion(conn, rows: List[tuple]) -> Dict[str, Any]:
+    """
+    Load every row twice: a first load, then a re-load that conflicts on every key.
+    Each pass records which load_rows path(s) handled its rows, because they differ
+    before and after partitioning: the first load is "legacy_upsert" on the old heap and
+    "attach_partition" (COPY + ATTACH) for years without a partition, but "partition_upsert"
+    for any year that already has one; the re-load is "legacy_upsert" vs "partition_upsert".
+    """
+    results = {}
+    for label in ("first_load", "reload"):
+        cur = conn.cursor()
+        start = time.perf_counter()
+        paths = load_rows(cur, rows)
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        cur.close()
+        results[label] = {"rows_per_s": round(len(rows) / elapsed), "paths": paths}
+        logger.info(f"{label:<10} {len(rows)} rows in {elapsed:.2f}s ({len(rows) / elapsed:,.0f} rows/s) via {paths}")
+    return results
+
+def bench_latest_bars(conn, symbols: int, n: int, queries: int) -> Dict[str, Any]:
+    """Latency of the dashboard's "latest N bars for a symbol" query."""
+    rng = random.Random(7)
+    cur = conn.cursor()
+    timings = []
+    for _ in range(queries):
+        symbol = f"{SYMBOL_PREFIX}{rng.randrange(symbols):05d}"
+        start = time.perf_counter()
+        cur.execute(LATEST_BARS_QUERY, (symbol, n))
+        cur.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    cur.close()
+    timings.sort()
+    result = {
+        "latest_n": n,
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+    }
+    logger.info(f"latest {n} bars: p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms over {queries} queries")
+    return result
+
+def cleanup(conn):
+    cur = conn.cursor()
+    cur.execute("DELETE FROM public.prices WHERE symbol LIKE %s", (SYMBOL_PREFIX.replace("_", "\\_") + "%",))
+    conn.commit()
+    cur.close()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark prices ingestion throughput and latest-N-bars latency on a SCRATCH "
+                    "database (e.g. restored from a production snapshot). Run before and after "
+                    "applying the partitioning migration there and compare. Never point it at production: "
+                    f"it loads {SYMBOL_PREFIX}* rows into public.prices and may create partitions."
+    )
+    parser.add_argument("--database", required=True,
+                        help="Scratch database name (overrides POSTGRES_DB; 'postgres' is refused)")
+    parser.add_argument("--symbols", type=int, default=200, help="Synthetic symbols to load")
+    parser.add_argument("--days", type=int, default=2520, help="Daily bars per symbol (default ~10 years)")
+    parser.add_argument("--end", type=date.fromisoformat, default=DEFAULT_END,
+                        help=f"Last synthetic bar date (default {DEFAULT_END}; keep it before the snapshot's "
+                             "earliest year to measure attach_partition, or use a recent date to measure partition_upsert)")
+    parser.add_argument("--latest", type=int, default=30, help="N for the latest-N-bars query")
+    parser.add_argument("--queries", type=int, default=1000, help="Latest-N-bars queries to time")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SYMBOL_PREFIX}* rows after the run")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.database == "postgres":
+        logger.error("Refusing to benchmark against the 'postgres' database; use a scratch copy")
+        sys.exit(1)
+    os.environ["POSTGRES_DB"] = args.database
+
+    try:
+        conn = get_db_connection()
+    except Exception as e:
+        logger.error(f"Database connection failed: {e}")
+        sys.exit(1)
+
+    # On a partitioned table, years without a partition are created through the
+    # bulk-load fast path and remain (empty) after cleanup; drop the scratch database after.
+    rows = synthetic_rows(args.symbols, args.days, args.end)
+    try:
+        results = bench_ingestion(conn, rows)
+        cur = conn.cursor()
+        cur.execute("ANALYZE public.prices")
+        conn.commit()
+        cur.close()
+        results.update(bench_latest_bars(conn, args.symbols, args.latest, args.queries))
+    finally:
+        if not args.keep:
+            cleanup(conn)
+        conn.close()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
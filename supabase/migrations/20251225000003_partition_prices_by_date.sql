@@ -0,0 +1,88 @@
+-- Migration: Partition prices by date
+-- Description: Converts public.prices into a yearly RANGE-partitioned table so the
+--              hot (recent) partitions stay small and old years can be bulk loaded and
+--              attached without touching live data.
+--              Drops idx_prices_symbol_date: it duplicated the (symbol, date) primary key,
+--              which Postgres can already scan backwards for "latest N bars per symbol".
+--              Adds a BRIN index on date for cheap date-range scans across symbols.
+
+BEGIN;
+
+-- 1. Move the existing heap aside
+ALTER TABLE public.prices RENAME TO prices_legacy;
+ALTER TABLE public.prices_legacy RENAME CONSTRAINT prices_pkey TO prices_legacy_pkey;
+DROP INDEX IF EXISTS public.idx_prices_symbol_date;
+
+-- 2. Partitioned parent (the primary key must include the partition key; it already does)
+CREATE TABLE public.prices (
+    symbol TEXT NOT NULL,
+    date DATE NOT NULL,
+    open NUMERIC(18, 4),
+    high NUMERIC(18, 4),
+    low NUMERIC(18, 4),
+    close NUMERIC(18, 4),
+    volume BIGINT,
+
+    PRIMARY KEY (symbol, date)
+) PARTITION BY RANGE (date);
+
+-- BRIN on date: a few pages per partition instead of a second B-tree per upsert.
+-- Created on the parent, so every partition (including attached ones) gets it.
+CREATE INDEX IF NOT EXISTS idx_prices_date_brin ON public.prices USING BRIN (date);
+
+-- Catches rows whose year has no partition yet. scripts/data_ingestion.py creates
+-- partitions before loading, so this should stay empty (ATTACH has to scan it).
+CREATE TABLE IF NOT EXISTS public.prices_default PARTITION OF public.prices DEFAULT;
+
+-- 3. Partition helper: one partition per calendar year, named prices_yYYYY
+CREATE OR REPLACE FUNCTION public.ensure_prices_partition(p_year INTEGER)
+RETURNS TEXT AS $$
+DECLARE
+    partition_name TEXT := format('prices_y%s', p_year);
+BEGIN
+    IF to_regclass(format('public.%I', partition_name)) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.prices FOR VALUES FROM (%L) TO (%L)',
+            partition_name,
+            make_date(p_year, 1, 1),
+            make_date(p_year + 1, 1, 1)
+        );
+    END IF;
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 4. Partitions for every year already in the table, plus this year and next
+DO $$
+DECLARE
+    first_year INTEGER;
+    y INTEGER;
+BEGIN
+    SELECT COALESCE(EXTRACT(YEAR FROM MIN(date))::INTEGER, EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER)
+    INTO first_year
+    FROM public.prices_legacy;
+
+    FOR y IN first_year .. EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER + 1 LOOP
+        PERFORM public.ensure_prices_partition(y);
+    END LOOP;
+END;
+$$;
+
+-- 5. Copy data across (routed to partitions) and drop the old heap.
+--    Insert in date order so the heap is physically date-clustered; otherwise every
+--    BRIN range would span the whole year and idx_prices_date_brin would prune nothing.
+INSERT INTO public.prices (symbol, date, open, high, low, close, volume)
+SELECT symbol, date, open, high, low, close, volume FROM public.prices_legacy
+ORDER BY date, symbol;
+
+DROP TABLE public.prices_legacy;
+
+COMMIT;
+
+ANALYZE public.prices;
+
+-- Verification (Comments for manual run)
+-- EXPLAIN ANALYZE SELECT * FROM prices WHERE symbol = 'AAPL' ORDER BY date DESC LIMIT 30;
+-- Should use Index Scan Backward on the prices_yYYYY_pkey of the newest partitions
+-- EXPLAIN ANALYZE SELECT * FROM prices WHERE date >= CURRENT_DATE - 7;
+-- Should prune to the current partition(s)